@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio server hosting many concurrent 2048 and Minesweeper sessions in one process.
+
+The sessions are the games from games.py. The server listens on the TCP or Unix socket and speaks the binary
+protocol of length-prefixed frames: uint32 length of the body followed by the body. Integers are big-endian,
+the observation is int32 little-endian (Numpy native on common platforms) in row-major order.
+
+Request body: uint8 opcode, uint32 request id and then by the opcode:
+    NEW   - uint8 game (GAME_IDS), uint16 width, uint16 height, uint16 param (max_random_value or n_mines)
+    STEP  - uint32 session id, uint32 action
+    RESET - uint32 session id
+    CLOSE - uint32 session id
+
+Response body: uint8 status, uint32 request id (same as in the request) and then:
+    OK    - uint32 session id, float32 reward, uint8 done, uint16 rows, uint16 columns, observation
+    ERROR - utf-8 error message
+
+Finished games are not reset automatically, STEP fails until the client sends RESET. Sessions not used
+for idle_timeout seconds are evicted and sessions whose game raised an error are closed. The game settings
+are validated by games.py, invalid NEW requests get the ERROR response.
+
+All game work runs on the event loop, so the board sizes are limited (MAX_BOARD_SIZE, MAX_MINESWEEPER_TILES)
+to keep one session from blocking the others. The requests received during one event loop iteration
+are processed in one batch and the responses for one connection are written at once.
+
+usage: python game_server.py [--host 127.0.0.1] [--port 8765] [--unix PATH] [--idle-timeout 300]
+                             [--max-board-size 64] [--max-minesweeper-tiles 400]
+"""
+
+import argparse
+import asyncio
+import itertools
+import struct
+import time
+
+import numpy as np
+
+import instrumentation
+from games import make_game
+
+NEW = 1
+STEP = 2
+RESET = 3
+CLOSE = 4
+
+OK = 0
+ERROR = 1
+
+GAME_IDS = {
+    0: "2048",
+    1: "minesweeper",
+}
+
+LENGTH = struct.Struct("!I")
+REQUEST_HEADER = struct.Struct("!BI")
+NEW_REQUEST = struct.Struct("!BHHH")
+SESSION_REQUEST = struct.Struct("!I")
+STEP_REQUEST = struct.Struct("!II")
+RESPONSE_HEADER = struct.Struct("!BI")
+OK_RESPONSE = struct.Struct("!IfBHH")
+OBSERVATION_DTYPE = np.dtype("<i4")
+
+MAX_FRAME_SIZE = 2**16
+MAX_BOARD_SIZE = 64
+# minesweeper Board places the mines and uncovers the clear areas in Python loops and recursion,
+# larger boards would block the event loop and end the games on the recursion limit
+MAX_MINESWEEPER_TILES = 400
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_frame(body:bytes) -> bytes:
+    return LENGTH.pack(len(body)) + body
+
+
+def encode_ok(request_id:int, session_id:int, reward:float=0.0, done:bool=False, observation:np.ndarray=None) -> bytes:
+    """
+    :return: the framed OK response, without observation if it is None
+    """
+
+    rows, cols = observation.shape if observation is not None else (0, 0)
+    body = RESPONSE_HEADER.pack(OK, request_id) + OK_RESPONSE.pack(session_id, reward, done, rows, cols)
+
+    if observation is not None:
+        body += observation.astype(OBSERVATION_DTYPE, copy=False).tobytes()
+
+    return encode_frame(body)
+
+
+def encode_error(request_id:int, message:str) -> bytes:
+    return encode_frame(RESPONSE_HEADER.pack(ERROR, request_id) + message.encode("utf-8"))
+
+
+class Session(object):
+    """
+    One game hosted by the server.
+    """
+
+    __slots__ = ["game", "observation", "done", "last_used"]
+
+    def __init__(self, game):
+        self.game = game
+        self.observation = np.zeros(game.observation_shape, dtype=game.OBSERVATION_DTYPE)
+        self.done = False
+        self.last_used = time.monotonic()
+
+
+class GameServer(object):
+    """
+    Keeps the game sessions and serves the requests of all connections.
+    """
+
+    def __init__(self, idle_timeout:float=300.0, max_sessions:int=100000, max_board_size:int=MAX_BOARD_SIZE,
+                 max_minesweeper_tiles:int=MAX_MINESWEEPER_TILES):
+        """
+        :param idle_timeout: seconds after which the not used session is evicted
+        :param max_sessions: maximal no. of sessions, NEW fails when it is reached
+        :param max_board_size: maximal width and height of the board
+        :param max_minesweeper_tiles: maximal no. of tiles (width * height) of the Minesweeper board
+        """
+
+        self.__idle_timeout = idle_timeout
+        self.__max_sessions = max_sessions
+        self.__max_board_size = max_board_size
+        self.__max_minesweeper_tiles = max_minesweeper_tiles
+        self.__sessions = {}
+        self.__session_ids = itertools.count(1)
+        self.__pending = []
+        self.__flush_scheduled = False
+        self.__n_requests = 0
+        self.__n_batches = 0
+
+    @property
+    def n_sessions(self) -> int:
+        return len(self.__sessions)
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: no. of sessions, processed requests and batches
+        """
+
+        return {"sessions": len(self.__sessions), "requests": self.__n_requests, "batches": self.__n_batches}
+
+    async def serve(self, host:str="127.0.0.1", port:int=8765, unix_path:str=None):
+        """
+        Serves forever on the TCP socket or on the Unix socket if unix_path is given.
+        """
+
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+
+        eviction = asyncio.ensure_future(self.evict_idle_sessions())
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            eviction.cancel()
+
+    async def handle_connection(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        """
+        Reads the request frames of one connection and queues them for the batch processing.
+        """
+
+        try:
+            while True:
+                length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+                if length > MAX_FRAME_SIZE:
+                    raise ProtocolError("Frame too large: {} bytes".format(length))
+
+                self.__queue(await reader.readexactly(length), writer)
+                # waits only when the client doesn't read the responses
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            writer.close()
+
+    async def evict_idle_sessions(self):
+        """
+        Periodically removes the sessions which were not used for idle_timeout seconds.
+        """
+
+        while True:
+            await asyncio.sleep(min(max(self.__idle_timeout / 4, 0.1), 60.0))
+            deadline = time.monotonic() - self.__idle_timeout
+            idle_ids = [session_id for session_id, session in self.__sessions.items() if session.last_used < deadline]
+
+            for session_id in idle_ids:
+                del self.__sessions[session_id]
+
+    def __queue(self, body:bytes, writer:asyncio.StreamWriter):
+        self.__pending.append((body, writer))
+
+        if not self.__flush_scheduled:
+            self.__flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.__flush)
+
+    def __flush(self):
+        """
+        Processes all requests received during the last event loop iteration.
+        """
+
+        batch = self.__pending
+        self.__pending = []
+        self.__flush_scheduled = False
+        self.__n_requests += len(batch)
+        self.__n_batches += 1
+
+        responses = {}
+        now = time.monotonic()
+
+        for body, writer in batch:
+            responses.setdefault(writer, []).append(self.__process(body, now))
+
+        for writer, frames in responses.items():
+            if not writer.is_closing():
+                writer.write(b"".join(frames))
+
+    def __process(self, body:bytes, now:float) -> bytes:
+        """
+        :return: the framed response to the request body
+        """
+
+        request_id = 0
+
+        try:
+            opcode, request_id = REQUEST_HEADER.unpack_from(body)
+            offset = REQUEST_HEADER.size
+
+            if opcode == NEW:
+                return self.__new(request_id, *NEW_REQUEST.unpack_from(body, offset))
+
+            if opcode == STEP:
+                session_id, action = STEP_REQUEST.unpack_from(body, offset)
+            else:
+                session_id, = SESSION_REQUEST.unpack_from(body, offset)
+
+            session = self.__sessions.get(session_id)
+            if session is None:
+                return encode_error(request_id, "Unknown session {}".format(session_id))
+            session.last_used = now
+
+            if opcode == CLOSE:
+                del self.__sessions[session_id]
+                return encode_ok(request_id, session_id)
+            elif opcode not in (STEP, RESET):
+                return encode_error(request_id, "Unknown opcode {}".format(opcode))
+            elif opcode == STEP and session.done:
+                return encode_error(request_id, "Game of session {} is finished, RESET it".format(session_id))
+            elif opcode == STEP and not 0 <= action < session.game.n_actions:
+                return encode_error(request_id, "Action must be in range(0, {})".format(session.game.n_actions))
+
+            try:
+                if opcode == STEP:
+                    reward, session.done = session.game.step(action, session.observation)
+                    return encode_ok(request_id, session_id, reward, session.done, session.observation)
+                else:
+                    session.game.reset(session.observation)
+                    session.done = False
+                    return encode_ok(request_id, session_id, observation=session.observation)
+            except Exception as e:
+                # the board may be left half updated, so the session is not kept
+                del self.__sessions[session_id]
+                return encode_error(request_id, "{}: {}, session {} closed".format(type(e).__name__, e, session_id))
+        except struct.error:
+            return encode_error(request_id, "Malformed request")
+        except Exception as e:
+            return encode_error(request_id, "{}: {}".format(type(e).__name__, e))
+
+    def __new(self, request_id:int, game_id:int, width:int, height:int, param:int) -> bytes:
+        if game_id not in GAME_IDS:
+            return encode_error(request_id, "Unknown game {}".format(game_id))
+        if not (0 < width <= self.__max_board_size and 0 < height <= self.__max_board_size):
+            return encode_error(request_id, "Board size must be in range(1, {})".format(self.__max_board_size + 1))
+        if len(self.__sessions) >= self.__max_sessions:
+            return encode_error(request_id, "Too many sessions")
+
+        # the invalid settings (e.g. too many mines) raise ValueError answered by the ERROR response
+        if GAME_IDS[game_id] == "2048":
+            game = make_game("2048", width=width, height=height, max_random_value=param)
+        else:
+            if width * height > self.__max_minesweeper_tiles:
+                return encode_error(request_id, "Minesweeper board must have at most {} tiles".format(
+                    self.__max_minesweeper_tiles))
+            game = make_game("minesweeper", width=width, height=height, n_mines=param)
+
+        session = Session(game)
+        game.reset(session.observation)
+        session_id = next(self.__session_ids)
+        self.__sessions[session_id] = session
+
+        return encode_ok(request_id, session_id, observation=session.observation)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asyncio server hosting many 2048 and Minesweeper sessions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Unix socket path, used instead of TCP")
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="seconds to evict the not used session")
+    parser.add_argument("--max-sessions", type=int, default=100000)
+    parser.add_argument("--max-board-size", type=int, default=MAX_BOARD_SIZE, help="maximal width and height")
+    parser.add_argument("--max-minesweeper-tiles", type=int, default=MAX_MINESWEEPER_TILES,
+                        help="maximal width * height of the Minesweeper board")
+    args = parser.parse_args()
+
+    instrumentation.enable_from_env()
+    server = GameServer(idle_timeout=args.idle_timeout, max_sessions=args.max_sessions,
+                        max_board_size=args.max_board_size, max_minesweeper_tiles=args.max_minesweeper_tiles)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
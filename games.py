@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Common reset/step interface of the 2048 and Minesweeper boards.
+
+The boards live in their own directories as 'board.py' modules, so they are loaded here by their file path
+under the unique module names 'board_2048' and 'board_minesweeper'.
+"""
+
+import importlib.util
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_board_module(game_dir:str):
+    """
+    Imports the 'board.py' module from the game directory.
+
+    :param game_dir: the game directory name, e.g. '2048' or 'minesweeper'
+    :return: the board module, registered in sys.modules as 'board_<game_dir>'
+    """
+
+    name = "board_{}".format(game_dir)
+
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT_DIR, game_dir, "board.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+
+    return sys.modules[name]
+
+
+Board2048 = load_board_module("2048").Board
+BoardMinesweeper = load_board_module("minesweeper").Board
+
+
+class Game(object):
+    """
+    One game with the common reset/step interface.
+
+    The observation is always a Numpy 2D int32 array of the board shape and it is written into the given
+    array, so it can be a view of a shared buffer. The action is an integer in range(n_actions).
+    """
+
+    OBSERVATION_DTYPE = np.int32
+
+    @property
+    def observation_shape(self) -> tuple:
+        raise NotImplementedError
+
+    @property
+    def n_actions(self) -> int:
+        raise NotImplementedError
+
+    def reset(self, observation:np.ndarray):
+        """
+        Starts a new game.
+
+        :param observation: array to write the initial observation into
+        """
+
+        raise NotImplementedError
+
+    def step(self, action:int, observation:np.ndarray) -> tuple:
+        """
+        Performs the action.
+
+        :param action: action index
+        :param observation: array to write the new observation into
+        :return: (reward, done)
+        """
+
+        raise NotImplementedError
+
+
+class Game2048(Game):
+    """
+    The 2048 game. Actions are indexes of Board.POSSIBLE_MOVES, the observation is the board matrix
+    and the reward is the sum of the tile values created by merging (the original 2048 score), without
+    the random tile inserted after the move.
+    """
+
+    def __init__(self, width:int, height:int, max_random_value:int=4):
+        # validated here, so the wrong settings fail when the environment is created, not in the first reset;
+        # the Board places two initial tiles and would never finish on a smaller board
+        if width < 1 or height < 1 or width * height < 2:
+            raise ValueError("2048 board must have at least 2 tiles")
+        if max_random_value not in [2**x for x in range(1, 21)]:
+            raise ValueError("'max_random_value' must be from numbers of powering 2")
+
+        self.__width = width
+        self.__height = height
+        self.__max_random_value = max_random_value
+        self.__board = None
+
+    @property
+    def board(self):
+        return self.__board
+
+    @property
+    def observation_shape(self) -> tuple:
+        return self.__height, self.__width
+
+    @property
+    def n_actions(self) -> int:
+        return len(Board2048.POSSIBLE_MOVES)
+
+    def reset(self, observation:np.ndarray):
+        self.__board = Board2048(self.__width, self.__height, max_random_value=self.__max_random_value)
+        observation[...] = self.__board.matrix
+
+    def step(self, action:int, observation:np.ndarray) -> tuple:
+        original_matrix = np.copy(self.__board.matrix)
+        reward = 0.0
+
+        if self.__board.move(Board2048.POSSIBLE_MOVES[action]):
+            reward = self.__get_merge_reward(original_matrix, self.__board.matrix)
+            self.__board.insert_random_tile()
+            observation[...] = self.__board.matrix
+
+        return reward, self.__board.check_gameover()
+
+    @staticmethod
+    def __get_merge_reward(before:np.ndarray, after:np.ndarray) -> float:
+        """
+        Computes the sum of the merged tile values from the tile counts before and after the move.
+        Merging creates one tile 2^k from two tiles 2^(k-1), so the count of 2^k tiles changes by
+        merges[k] - 2 * merges[k+1] and the merges are solved from the highest value down.
+
+        :return: sum of the tile values created by merging
+        """
+
+        length = int(max(before.max(), after.max())).bit_length() + 1
+        counts_before = np.bincount(np.log2(before[before > 0]).astype(int), minlength=length)
+        counts_after = np.bincount(np.log2(after[after > 0]).astype(int), minlength=length)
+        reward = 0
+        merges = 0
+
+        for k in range(length - 1, 0, -1):
+            merges = int(counts_after[k] - counts_before[k]) + 2 * merges
+            reward += merges * 2**k
+
+        return float(reward)
+
+
+class GameMinesweeper(Game):
+    """
+    The Minesweeper game. Action is the index of clicked tile in the flattened board (row * width + col).
+    The observation is the gaming matrix with HIDDEN value on not visible tiles and the reward is the number
+    of newly uncovered tiles or MINE_REWARD when the mine was clicked.
+
+    The Board uncovers the clear areas recursively, so on large sparse boards the click can exceed
+    the recursion limit. Such game ends (done) with the tiles uncovered until then.
+    """
+
+    HIDDEN = -1
+    MINE_REWARD = -1.0
+
+    def __init__(self, width:int, height:int, n_mines:int):
+        if width < 1 or height < 1:
+            raise ValueError("Minesweeper board must have at least 1 tile")
+        # the Board would never finish placing the mines otherwise
+        if not 0 <= n_mines <= BoardMinesweeper.get_max_mines(width, height):
+            raise ValueError("'n_mines' must be from 0 to {}".format(BoardMinesweeper.get_max_mines(width, height)))
+
+        self.__width = width
+        self.__height = height
+        self.__n_mines = n_mines
+        self.__board = None
+
+    @property
+    def board(self):
+        return self.__board
+
+    @property
+    def observation_shape(self) -> tuple:
+        return self.__height, self.__width
+
+    @property
+    def n_actions(self) -> int:
+        return self.__height * self.__width
+
+    def reset(self, observation:np.ndarray):
+        self.__board = BoardMinesweeper(self.__width, self.__height, self.__n_mines)
+        observation.fill(self.HIDDEN)
+
+    def step(self, action:int, observation:np.ndarray) -> tuple:
+        row, col = divmod(action, self.__width)
+        n_visible = np.count_nonzero(self.__board.visibility_matrix)
+        done = False
+
+        try:
+            self.__board.click(row, col)
+        except BoardMinesweeper.GameOverException:
+            return self.MINE_REWARD, True
+        except BoardMinesweeper.GameFinishedException:
+            done = True
+        except RecursionError:
+            done = True
+
+        np.copyto(observation, np.where(self.__board.visibility_matrix, self.__board.matrix, self.HIDDEN))
+
+        return float(np.count_nonzero(self.__board.visibility_matrix) - n_visible), done
+
+
+GAMES = {
+    "2048": Game2048,
+    "minesweeper": GameMinesweeper,
+}
+
+
+def make_game(game:str, **game_kwargs) -> Game:
+    """
+    :param game: the game name, one of GAMES keys
+    :param game_kwargs: the game (board) constructor arguments
+    :return: the game instance
+    """
+
+    if game not in GAMES:
+        raise ValueError("Unknown game. Possible games are {}".format(", ".join(sorted(GAMES))))
+
+    return GAMES[game](**game_kwargs)
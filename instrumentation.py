@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of the Board hot-path methods.
+
+When it is enabled, the methods listed in METHODS are replaced on the Board classes by wrappers recording
+the call counts, latencies and optionally allocations. When it is disabled, the original methods are put back, so the
+instrumentation costs nothing when it is off.
+
+example:
+import instrumentation
+instrumentation.enable()
+... play ...
+print(instrumentation.snapshot())
+
+or set the environment variable PYGAMES_INSTRUMENT to the file path (or '-' for stdout) where the periodic
+JSON lines are written by the processes using enable_from_env(), e.g. the VectorEnv workers.
+"""
+
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from games import load_board_module
+
+# game directory -> instrumented Board methods, private methods by their mangled names
+METHODS = {
+    "2048": ["move", "_Board__move_line", "check_gameover"],
+    "minesweeper": ["_Board__init_board", "_Board__uncover", "_Board__check_game_finish", "pretty_output"],
+}
+
+MAX_SAMPLES = 10000
+PERCENTILES = [50, 90, 99]
+ENV_PATH = "PYGAMES_INSTRUMENT"
+ENV_INTERVAL = "PYGAMES_INSTRUMENT_INTERVAL"
+ENV_ALLOCATIONS = "PYGAMES_INSTRUMENT_ALLOC"
+# measured at the outermost call only, the inner calls are included in it
+RECURSIVE_METHODS = ["_Board__uncover"]
+
+_originals = {}
+_stats = {}
+_track_allocations = False
+_started_tracemalloc = False
+# [traced memory at the call start, peak traced memory so far] of the running instrumented calls,
+# they can be nested at most once each (the recursive methods are measured at the outermost call only)
+_allocation_frames = np.zeros((sum(len(names) for names in METHODS.values()), 2), dtype=np.int64)
+_allocation_depth = 0
+
+
+class MethodStats(object):
+    """
+    Statistics of one method. Latencies are kept in the reservoir sample of maximally MAX_SAMPLES values,
+    so the percentiles are estimated, the count, total and max are exact.
+
+    The sample storage is preallocated, so recording doesn't allocate memory which would be counted
+    to the allocations of the instrumented caller.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.net_allocated_bytes = 0
+        self.total_peak_allocated_bytes = 0
+        self.max_peak_allocated_bytes = 0
+        self.samples = np.zeros(MAX_SAMPLES, dtype=np.int64)
+        self.n_samples = 0
+        # own generator, so the instrumentation doesn't change the random state of the games
+        self.__random = random.Random(0)
+
+    def record(self, elapsed_ns:int):
+        self.count += 1
+        self.total_ns += elapsed_ns
+
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+        if self.n_samples < MAX_SAMPLES:
+            self.samples[self.n_samples] = elapsed_ns
+            self.n_samples += 1
+        else:
+            i = self.__random.randrange(self.count)
+            if i < MAX_SAMPLES:
+                self.samples[i] = elapsed_ns
+
+    def record_allocations(self, net_bytes:int, peak_bytes:int):
+        self.net_allocated_bytes += net_bytes
+        self.total_peak_allocated_bytes += peak_bytes
+
+        if peak_bytes > self.max_peak_allocated_bytes:
+            self.max_peak_allocated_bytes = peak_bytes
+
+    def to_dict(self) -> dict:
+        result = {
+            "calls": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.count / 1e3 if self.count else 0.0,
+            "max_us": self.max_ns / 1e3,
+        }
+
+        samples = self.samples[:self.n_samples] if self.n_samples else np.zeros(1)
+        for percentile, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+            result["p{}_us".format(percentile)] = float(value) / 1e3
+
+        if _track_allocations:
+            result["net_allocated_bytes"] = self.net_allocated_bytes
+            result["mean_peak_allocated_bytes"] = self.total_peak_allocated_bytes / self.count if self.count else 0.0
+            result["max_peak_allocated_bytes"] = self.max_peak_allocated_bytes
+
+        return result
+
+
+def _get_stats_name(game_dir:str, method_name:str) -> str:
+    return "{}.Board.{}".format(game_dir, method_name.replace("_Board__", "__"))
+
+
+def _start_allocations_frame():
+    """
+    Starts measuring the allocations of one call. The tracemalloc peak is global, so before it is reset
+    for this call, the peak reached so far is saved to the caller's frame.
+
+    The frames are kept in the preallocated array and the values read from tracemalloc are freed before
+    the measured call starts, so the wrapper leaves no own objects in the measured memory.
+    """
+
+    global _allocation_depth
+
+    current, peak = tracemalloc.get_traced_memory()
+
+    if _allocation_depth and peak > _allocation_frames[_allocation_depth - 1, 1]:
+        _allocation_frames[_allocation_depth - 1, 1] = peak
+
+    tracemalloc.reset_peak()
+    _allocation_frames[_allocation_depth] = current
+    _allocation_depth += 1
+
+
+def _stop_allocations_frame() -> tuple:
+    """
+    :return: (net allocated bytes, peak allocated bytes) of the finished call
+    """
+
+    global _allocation_depth
+
+    current, peak = tracemalloc.get_traced_memory()
+    _allocation_depth -= 1
+    start, frame_peak = _allocation_frames[_allocation_depth].tolist()
+    frame_peak = max(frame_peak, peak)
+
+    if _allocation_depth and frame_peak > _allocation_frames[_allocation_depth - 1, 1]:
+        _allocation_frames[_allocation_depth - 1, 1] = frame_peak
+
+    return current - start, frame_peak - start
+
+
+def _wrap(method, stats:MethodStats, track_allocations:bool, board_class:type, method_name:str):
+    perf_counter_ns = time.perf_counter_ns
+    recursive = method_name in RECURSIVE_METHODS
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if recursive:
+            # only the outermost call is measured, the recursive calls go straight to the original method,
+            # so the instrumentation doesn't add the stack frames per recursion level
+            setattr(board_class, method_name, method)
+        # the time is read outside of the allocations frame, so its int objects are not measured
+        start = perf_counter_ns()
+        if track_allocations:
+            _start_allocations_frame()
+
+        try:
+            return method(*args, **kwargs)
+        finally:
+            if track_allocations:
+                allocations = _stop_allocations_frame()
+            elapsed_ns = perf_counter_ns() - start
+            if track_allocations:
+                stats.record_allocations(*allocations)
+            stats.record(elapsed_ns)
+            if recursive:
+                setattr(board_class, method_name, wrapper)
+
+    return wrapper
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def enable(track_allocations:bool=False, boards:dict=None):
+    """
+    Replaces the METHODS by the recording wrappers. The statistics of the previous runs are kept.
+
+    Latencies are inclusive, i.e. the nested instrumented calls are counted in their callers too. The recursive
+    __uncover is measured at the outermost call only (one call per click): while it runs, the original method
+    is put back on the class, so the recursion depth and the game results don't change. Because of that
+    the Boards must not be used from several threads while the instrumentation is enabled.
+
+    The allocations are measured by tracemalloc (started here if it is not running), so the Numpy buffers
+    are included: the net allocated bytes (memory which outlived the call) and the peak of the memory
+    allocated during the call. They are in bytes, not in the numbers of allocations: tracemalloc exposes
+    only the traced bytes cheaply, counting the allocated blocks would need a snapshot of all traces per call
+    and sys.getallocatedblocks() misses the Numpy buffers and slows down with the heap size.
+
+    tracemalloc slows down every allocation and the allocation bookkeeping of the nested instrumented calls
+    (move in check_gameover, __move_line in move) runs inside the caller's timed window, so the latencies
+    are skewed when the allocations are tracked. The bookkeeping itself leaves nothing in the net bytes,
+    the peak includes a few hundred bytes of the call's temporary objects (arguments, nested bookkeeping).
+
+    :param track_allocations: record the allocations too
+    :param boards: game directory -> Board class to instrument, the classes loaded by games.py by default;
+                   e.g. {'minesweeper': Board} for the scripts importing the board module directly
+    """
+
+    global _track_allocations, _started_tracemalloc
+
+    if is_enabled():
+        disable()
+    _track_allocations = track_allocations
+
+    if track_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+    if boards is None:
+        boards = {game_dir: load_board_module(game_dir).Board for game_dir in METHODS}
+
+    for game_dir, board_class in boards.items():
+        method_names = METHODS[game_dir]
+
+        for method_name in method_names:
+            name = _get_stats_name(game_dir, method_name)
+            method = board_class.__dict__[method_name]
+            stats = _stats.setdefault(name, MethodStats())
+
+            _originals[(board_class, method_name)] = method
+            setattr(board_class, method_name, _wrap(method, stats, track_allocations, board_class, method_name))
+
+
+def disable():
+    """
+    Puts the original methods back. The statistics are kept.
+    """
+
+    global _started_tracemalloc
+
+    for (board_class, method_name), method in _originals.items():
+        setattr(board_class, method_name, method)
+
+    _originals.clear()
+
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def reset():
+    """
+    Clears the statistics.
+    """
+
+    for stats in _stats.values():
+        stats.__init__()
+
+
+def snapshot() -> dict:
+    """
+    :return: the statistics of all instrumented methods, which were called at least once
+    """
+
+    return {
+        "timestamp": time.time(),
+        "pid": os.getpid(),
+        "methods": {name: stats.to_dict() for name, stats in sorted(_stats.items()) if stats.count},
+    }
+
+
+def write_json_line(stream):
+    """
+    Writes the snapshot() as one JSON line.
+    """
+
+    stream.write(json.dumps(snapshot()) + "\n")
+    stream.flush()
+
+
+class JsonLineReporter(object):
+    """
+    Writes the snapshot() as a JSON line every interval seconds in a daemon thread.
+    """
+
+    def __init__(self, path:str, interval:float=10.0):
+        """
+        :param path: file path where the lines are appended or '-' for stdout
+        :param interval: seconds between two lines
+        """
+
+        self.__path = path
+        self.__interval = interval
+        self.__stop_event = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+
+    def start(self):
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops the thread, the last line is written on stop.
+        """
+
+        self.__stop_event.set()
+        self.__thread.join()
+
+    def __run(self):
+        stream = sys.stdout if self.__path == "-" else open(self.__path, "a")
+
+        try:
+            while not self.__stop_event.wait(self.__interval):
+                write_json_line(stream)
+            write_json_line(stream)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+
+def enable_from_env():
+    """
+    Enables the instrumentation and starts the JsonLineReporter if the PYGAMES_INSTRUMENT environment variable
+    is set. The interval is taken from PYGAMES_INSTRUMENT_INTERVAL (10 seconds by default) and the allocations
+    are tracked when PYGAMES_INSTRUMENT_ALLOC is set to 1.
+
+    :return: the started JsonLineReporter or None
+    """
+
+    path = os.environ.get(ENV_PATH)
+
+    if not path:
+        return None
+
+    enable(track_allocations=os.environ.get(ENV_ALLOCATIONS) == "1")
+    reporter = JsonLineReporter(path, float(os.environ.get(ENV_INTERVAL, 10.0)))
+    reporter.start()
+
+    return reporter
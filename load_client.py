@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Client of the game_server.py protocol and the local load generator.
+
+The load generator opens the connections, creates the sessions on them and steps every session with random
+actions as fast as the server answers (one outstanding request per session), then reports requests/sec
+and the latency percentiles. Only the stepping is timed, connecting and NEW/CLOSE requests are not.
+
+usage: python load_client.py [--port 8765 | --unix PATH] [--connections 8] [--sessions 128] [--seconds 10]
+                             [--game 2048] [--spawn-server]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from game_server import (NEW, STEP, RESET, CLOSE, OK, GAME_IDS, LENGTH, REQUEST_HEADER, NEW_REQUEST,
+                         SESSION_REQUEST, STEP_REQUEST, RESPONSE_HEADER, OK_RESPONSE, OBSERVATION_DTYPE,
+                         encode_frame)
+
+GAME_NAMES = {name: game_id for game_id, name in GAME_IDS.items()}
+
+
+class ServerError(Exception):
+    pass
+
+
+class GameClient(object):
+    """
+    One connection to the game server. The requests are pipelined, i.e. many of them can be awaited
+    concurrently, the responses are matched by the request id.
+
+    The OK response is returned as a tuple (session id, reward, done, observation).
+    """
+
+    def __init__(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        self.__reader = reader
+        self.__writer = writer
+        self.__request_ids = itertools.count(1)
+        self.__futures = {}
+        self.__error = None
+        self.__read_task = asyncio.ensure_future(self.__read_responses())
+
+    @classmethod
+    async def connect(cls, host:str="127.0.0.1", port:int=8765, unix_path:str=None):
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+
+        return cls(reader, writer)
+
+    async def new(self, game:str, width:int, height:int, param:int) -> tuple:
+        """
+        :param game: '2048' or 'minesweeper'
+        :param param: max_random_value for 2048, n_mines for Minesweeper
+        """
+
+        return await self.__request(NEW, NEW_REQUEST.pack(GAME_NAMES[game], width, height, param))
+
+    async def step(self, session_id:int, action:int) -> tuple:
+        return await self.__request(STEP, STEP_REQUEST.pack(session_id, action))
+
+    async def reset(self, session_id:int) -> tuple:
+        return await self.__request(RESET, SESSION_REQUEST.pack(session_id))
+
+    async def close_session(self, session_id:int) -> tuple:
+        return await self.__request(CLOSE, SESSION_REQUEST.pack(session_id))
+
+    async def close(self):
+        self.__read_task.cancel()
+        self.__writer.close()
+        await self.__writer.wait_closed()
+
+    async def __request(self, opcode:int, payload:bytes) -> tuple:
+        if self.__error is not None:
+            raise self.__error
+
+        request_id = next(self.__request_ids) % 2**32
+        future = asyncio.get_running_loop().create_future()
+        self.__futures[request_id] = future
+        self.__writer.write(encode_frame(REQUEST_HEADER.pack(opcode, request_id) + payload))
+
+        return await future
+
+    async def __read_responses(self):
+        try:
+            while True:
+                length, = LENGTH.unpack(await self.__reader.readexactly(LENGTH.size))
+                body = await self.__reader.readexactly(length)
+                status, request_id = RESPONSE_HEADER.unpack_from(body)
+                future = self.__futures.pop(request_id, None)
+
+                # e.g. the error response to the malformed request has id 0
+                if future is None or future.done():
+                    continue
+
+                if status == OK:
+                    session_id, reward, done, rows, cols = OK_RESPONSE.unpack_from(body, RESPONSE_HEADER.size)
+                    observation = np.frombuffer(body, dtype=OBSERVATION_DTYPE,
+                                                offset=RESPONSE_HEADER.size + OK_RESPONSE.size).reshape(rows, cols)
+                    future.set_result((session_id, reward, bool(done), observation))
+                else:
+                    future.set_exception(ServerError(body[RESPONSE_HEADER.size:].decode("utf-8")))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if isinstance(e, (asyncio.IncompleteReadError, ConnectionError)):
+                self.__error = ConnectionError("Connection to the server lost: {}".format(e))
+            else:
+                self.__error = ConnectionError("Failed to read the response: {}: {}".format(type(e).__name__, e))
+
+            for future in self.__futures.values():
+                if not future.done():
+                    future.set_exception(self.__error)
+            self.__futures.clear()
+
+
+async def run_session(client:GameClient, session_id:int, n_actions:int, deadline:float, latencies:list):
+    """
+    Steps one session with random actions until the deadline, resets the finished games.
+    """
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        _, _, done, _ = await client.step(session_id, random.randrange(n_actions))
+        latencies.append(time.perf_counter() - start)
+
+        if done:
+            start = time.perf_counter()
+            await client.reset(session_id)
+            latencies.append(time.perf_counter() - start)
+
+
+async def generate_load(args) -> tuple:
+    """
+    Connects and creates the sessions first, then steps them for args.seconds and closes them, so only
+    the stepping is timed.
+
+    :return: (the latencies of all STEP and RESET requests in seconds, the stepping time in seconds)
+    """
+
+    clients = []
+    latencies = []
+    n_actions = 4 if args.game == "2048" else args.width * args.height
+
+    try:
+        for _ in range(args.connections):
+            clients.append(await GameClient.connect(args.host, args.port, args.unix))
+
+        sessions = [clients[i % len(clients)] for i in range(args.sessions)]
+        responses = await asyncio.gather(*[client.new(args.game, args.width, args.height, args.param)
+                                           for client in sessions])
+        session_ids = [session_id for session_id, _, _, _ in responses]
+
+        start = time.perf_counter()
+        await asyncio.gather(*[run_session(client, session_id, n_actions, start + args.seconds, latencies)
+                               for client, session_id in zip(sessions, session_ids)])
+        elapsed = time.perf_counter() - start
+
+        await asyncio.gather(*[client.close_session(session_id) for client, session_id in zip(sessions, session_ids)])
+    finally:
+        for client in clients:
+            await client.close()
+
+    return latencies, elapsed
+
+
+def wait_for_server(args, process:subprocess.Popen, timeout:float=10.0):
+    async def try_connect():
+        client = await GameClient.connect(args.host, args.port, args.unix)
+        await client.close()
+
+    deadline = time.monotonic() + timeout
+
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited with code {}".format(process.returncode))
+        try:
+            asyncio.run(try_connect())
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the game server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Unix socket path, used instead of TCP")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=128, help="no. of concurrently played sessions")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--game", choices=sorted(GAME_NAMES), default="2048")
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--height", type=int, default=4)
+    parser.add_argument("--param", type=int, default=4, help="max_random_value for 2048, n_mines for Minesweeper")
+    parser.add_argument("--spawn-server", action="store_true", help="start the local game_server.py subprocess")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn_server:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_server.py")]
+        command += ["--unix", args.unix] if args.unix else ["--host", args.host, "--port", str(args.port)]
+        server = subprocess.Popen(command)
+        wait_for_server(args, server)
+
+    try:
+        latencies, elapsed = asyncio.run(generate_load(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies = np.array(latencies) * 1e3
+    print("{} sessions on {} connections, {} {}x{}".format(args.sessions, args.connections, args.game,
+                                                           args.width, args.height))
+    print("requests: {}".format(len(latencies)))
+    print("requests/sec: {:.0f}".format(len(latencies) / elapsed))
+    if len(latencies):
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print("latency ms: p50 {:.3f}  p99 {:.3f}  max {:.3f}".format(p50, p99, latencies.max()))
+
+
+if __name__ == "__main__":
+    main()
@@ -30,9 +30,12 @@ class Board(object):
         """
         :param width: no. of cols
         :param height: no. of rows
-        :param n_mines: no. of mines
+        :param n_mines: no. of mines, at most get_max_mines(width, height)
         """
 
+        if not 0 <= n_mines <= self.get_max_mines(width, height):
+            raise ValueError("'n_mines' must be from 0 to {}".format(self.get_max_mines(width, height)))
+
         self.__visibility_matrix = np.zeros((height, width), dtype=bool)
         self.__matrix = np.zeros((height, width), dtype=np.int32)
         self.__flag_matrix = np.copy(self.__visibility_matrix)
@@ -122,6 +125,17 @@ class Board(object):
 
         return self.__n_mines
 
+    @staticmethod
+    def get_max_mines(width:int, height:int) -> int:
+        """
+        The first clicked tile and its surrounding never contain a mine, so in the worst case (click inside
+        the board) up to 3x3 tiles stay clear.
+
+        :return: Maximal number of mines which can be placed on the board of given size.
+        """
+
+        return max(width * height - min(width, 3) * min(height, 3), 0)
+
     class GameOverException(Exception):
         pass
 
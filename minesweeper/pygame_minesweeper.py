@@ -0,0 +1,356 @@
+import argparse
+import sys
+
+import numpy as np
+import pygame
+from pygame.locals import *
+from board import Board
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GRAY = (128, 128, 128)
+LIGHT_GRAY = (192, 192, 192)
+DARK_GRAY = (96, 96, 96)
+RED = (255, 0, 0)
+
+# classic colors of the mine's count digits, index is the count
+DIGIT_COLORS = [None, (0, 0, 255), (0, 128, 0), (255, 0, 0), (0, 0, 128),
+                (128, 0, 0), (0, 128, 128), (0, 0, 0), (128, 128, 128)]
+
+ZOOM_LEVELS = [4, 6, 8, 12, 16, 24, 32, 48]
+MIN_TEXT_TILE_SIZE = 8
+MINES_DENSITY = 0.15
+SCROLL_STEP = 16
+DIRTY_RECTS_LIMIT = 256
+
+
+class BoardRenderer(object):
+    """
+    Renders the Minesweeper board onto a pygame surface.
+
+    All tiles are blitted from one pre-rendered tile atlas (one atlas per zoom level) into a tile cache
+    covering the viewport. Between two frames only the tiles whose visibility or flag state changed are blitted
+    again and after scrolling only the newly exposed tiles are drawn, so the cost of a frame depends on the
+    screen size and the changes, not on the board size.
+
+    Tile indexes:
+        -2 - not drawn yet (internal)
+        -1 - outside of the board
+        0:9 - the gaming matrix values (visible tile)
+        10 - flag on not visible tile
+        11 - not visible tile
+    """
+
+    UNKNOWN = -2
+    BLANK = -1
+    FLAG = 10
+    HIDDEN = 11
+    N_TILES = 12
+
+    def __init__(self, board:Board, surface:pygame.Surface, tile_size:int=16):
+        """
+        :param board: the Minesweeper board to render
+        :param surface: the surface to render on, usually the display surface
+        :param tile_size: initial tile size in pixels, must be one of ZOOM_LEVELS
+        """
+
+        if tile_size not in ZOOM_LEVELS:
+            raise ValueError("'tile_size' must be one of {}".format(ZOOM_LEVELS))
+
+        self.__board = board
+        self.__surface = surface
+        self.__tile_size = tile_size
+        self.__offset = [0, 0]
+        self.__atlases = {}
+        self.__font_cache = {}
+        self.__cache = None
+        self.__cache_key = None
+        self.__drawn_origin = None
+        self.__drawn_position = None
+        self.__drawn_tiles = None
+
+    @property
+    def board(self) -> Board:
+        return self.__board
+
+    @board.setter
+    def board(self, board:Board):
+        self.__board = board
+        self.invalidate()
+
+    @property
+    def tile_size(self) -> int:
+        return self.__tile_size
+
+    @property
+    def viewport(self) -> pygame.Rect:
+        """
+        :return: the visible part of the board in board pixel coordinates
+        """
+
+        return pygame.Rect(self.__offset[0], self.__offset[1],
+                           self.__surface.get_width(), self.__surface.get_height())
+
+    def invalidate(self):
+        """
+        Forces the redraw of the whole viewport on the next draw() call.
+        """
+
+        self.__drawn_tiles = None
+
+    def scroll(self, dx:int, dy:int):
+        """
+        Moves the viewport by (dx, dy) pixels, it is clamped to the board borders.
+        """
+
+        self.__set_offset(self.__offset[0] + dx, self.__offset[1] + dy)
+
+    def zoom(self, steps:int, focus:tuple=None):
+        """
+        Changes the tile size by the given number of ZOOM_LEVELS steps.
+
+        :param steps: positive to zoom in, negative to zoom out
+        :param focus: (x, y) surface position which stays above the same board point, surface center by default
+        """
+
+        level = ZOOM_LEVELS.index(self.__tile_size)
+        new_level = min(max(level + steps, 0), len(ZOOM_LEVELS) - 1)
+
+        if new_level == level:
+            return
+
+        if focus is None:
+            focus = (self.__surface.get_width() // 2, self.__surface.get_height() // 2)
+
+        old_size = self.__tile_size
+        self.__tile_size = ZOOM_LEVELS[new_level]
+        self.__set_offset((self.__offset[0] + focus[0]) * self.__tile_size // old_size - focus[0],
+                          (self.__offset[1] + focus[1]) * self.__tile_size // old_size - focus[1])
+
+    def tile_at(self, x:int, y:int):
+        """
+        :param x: surface x coordinate
+        :param y: surface y coordinate
+        :return: (row, col) of the tile at the surface position or None if there is no tile
+        """
+
+        row = (self.__offset[1] + y) // self.__tile_size
+        col = (self.__offset[0] + x) // self.__tile_size
+
+        if 0 <= row < self.board.shape[0] and 0 <= col < self.board.shape[1]:
+            return row, col
+        else:
+            return None
+
+    def draw(self) -> list:
+        """
+        Blits the tiles which changed since the last call to the tile cache and the changed parts of the cache
+        to the surface.
+
+        :return: list of changed surface rects, to be passed to pygame.display.update()
+        """
+
+        size = self.__tile_size
+        width, height = self.__surface.get_size()
+        origin = (self.__offset[1] // size, self.__offset[0] // size)
+        window_shape = (height // size + 2, width // size + 2)
+
+        if (size, window_shape) != self.__cache_key:
+            self.__cache = pygame.Surface((window_shape[1] * size, window_shape[0] * size)).convert()
+            self.__cache_key = (size, window_shape)
+            self.__drawn_origin = origin
+            self.__drawn_tiles = None
+
+        if self.__drawn_tiles is None:
+            self.__drawn_tiles = np.full(window_shape, self.UNKNOWN, dtype=np.int8)
+        elif origin != self.__drawn_origin:
+            self.__shift_cache(origin[0] - self.__drawn_origin[0], origin[1] - self.__drawn_origin[1])
+
+        tiles = self.__get_tiles(origin, window_shape)
+        dirty_rows, dirty_cols = np.nonzero(tiles != self.__drawn_tiles)
+        atlas, areas = self.__get_atlas(size)
+        blit = self.__cache.blit
+        dirty_rects = []
+
+        for i, j, tile in zip(dirty_rows.tolist(), dirty_cols.tolist(), tiles[dirty_rows, dirty_cols].tolist()):
+            position = (j * size, i * size)
+            if tile == self.BLANK:
+                dirty_rects.append(self.__cache.fill(BLACK, (position, (size, size))))
+            else:
+                dirty_rects.append(blit(atlas, position, areas[tile]))
+
+        self.__drawn_tiles = tiles
+        cache_position = (origin[1] * size - self.__offset[0], origin[0] * size - self.__offset[1])
+        moved = origin != self.__drawn_origin or cache_position != self.__drawn_position
+        self.__drawn_origin = origin
+        self.__drawn_position = cache_position
+
+        if moved or len(dirty_rects) > DIRTY_RECTS_LIMIT:
+            self.__surface.blit(self.__cache, cache_position)
+            return [self.__surface.get_rect()]
+
+        rects = []
+        for rect in dirty_rects:
+            rects.append(self.__surface.blit(self.__cache, rect.move(cache_position), rect))
+
+        return rects
+
+    def __set_offset(self, x:int, y:int):
+        max_x = max(self.board.shape[1] * self.__tile_size - self.__surface.get_width(), 0)
+        max_y = max(self.board.shape[0] * self.__tile_size - self.__surface.get_height(), 0)
+        self.__offset[0] = min(max(x, 0), max_x)
+        self.__offset[1] = min(max(y, 0), max_y)
+
+    def __shift_cache(self, d_rows:int, d_cols:int):
+        """
+        Moves the already drawn tiles in the cache after the viewport has crossed the tile borders, so only
+        the newly exposed tiles are drawn.
+        """
+
+        rows, cols = self.__drawn_tiles.shape
+        shifted_tiles = np.full((rows, cols), self.UNKNOWN, dtype=np.int8)
+
+        if abs(d_rows) < rows and abs(d_cols) < cols:
+            size = self.__tile_size
+            self.__cache.scroll(-d_cols * size, -d_rows * size)
+            shifted_tiles[max(-d_rows, 0):rows - max(d_rows, 0), max(-d_cols, 0):cols - max(d_cols, 0)] = \
+                self.__drawn_tiles[max(d_rows, 0):rows - max(-d_rows, 0), max(d_cols, 0):cols - max(-d_cols, 0)]
+
+        self.__drawn_tiles = shifted_tiles
+
+    def __get_tiles(self, origin:tuple, window_shape:tuple) -> np.ndarray:
+        """
+        :param origin: (row, col) of the top left tile of the window
+        :param window_shape: (rows, cols) of the window
+        :return: matrix of the atlas tile indexes of the board window, BLANK outside of the board
+        """
+
+        tiles = np.full(window_shape, self.BLANK, dtype=np.int8)
+        row_end = min(origin[0] + window_shape[0], self.board.shape[0])
+        col_end = min(origin[1] + window_shape[1], self.board.shape[1])
+        window = (slice(origin[0], row_end), slice(origin[1], col_end))
+        hidden_tiles = np.where(self.board.flag_matrix[window], self.FLAG, self.HIDDEN)
+
+        tiles[:row_end - origin[0], :col_end - origin[1]] = np.where(
+            self.board.visibility_matrix[window], self.board.matrix[window], hidden_tiles)
+
+        return tiles
+
+    def __get_atlas(self, size:int) -> tuple:
+        """
+        Renders (once per tile size) all tile images side by side into one surface.
+
+        :return: (atlas surface, list of the tile rects in the atlas)
+        """
+
+        if size not in self.__atlases:
+            atlas = pygame.Surface((self.N_TILES * size, size)).convert()
+            areas = [pygame.Rect(i * size, 0, size, size) for i in range(self.N_TILES)]
+
+            for value, area in enumerate(areas):
+                self.__draw_tile(atlas.subsurface(area), value)
+
+            self.__atlases[size] = (atlas, areas)
+
+        return self.__atlases[size]
+
+    def __draw_tile(self, tile:pygame.Surface, value:int):
+        size = tile.get_width()
+        border = 1 if size > 4 else 0
+
+        if value in (self.HIDDEN, self.FLAG):
+            tile.fill(DARK_GRAY)
+            tile.fill(LIGHT_GRAY, (0, 0, size - border, size - border))
+            tile.fill(GRAY, (border, border, size - 2 * border, size - 2 * border))
+        else:
+            tile.fill(DARK_GRAY)
+            tile.fill(LIGHT_GRAY, (border, border, size - border, size - border))
+
+        if value == self.FLAG:
+            pygame.draw.polygon(tile, RED, [(size // 4, size // 5), (size * 3 // 4, size // 2),
+                                            (size // 4, size * 4 // 5)])
+        elif value == Board.MINE:
+            pygame.draw.circle(tile, BLACK, (size // 2, size // 2), max(size // 3, 1))
+        elif Board.CLEAR < value < Board.MINE:
+            if size < MIN_TEXT_TILE_SIZE:
+                # too small for the digits, the count is shown by the color only
+                tile.fill(DIGIT_COLORS[value], (border, border, size - border, size - border))
+            else:
+                text = self.__get_font(size).render(str(value), True, DIGIT_COLORS[value])
+                tile.blit(text, text.get_rect(center=(size // 2, size // 2)))
+
+    def __get_font(self, size:int) -> pygame.font.Font:
+        if size not in self.__font_cache:
+            self.__font_cache[size] = pygame.font.SysFont("Arial", size - 2, bold=True)
+
+        return self.__font_cache[size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minesweeper rendered by pygame.")
+    parser.add_argument("--width", type=int, default=100, help="no. of cols")
+    parser.add_argument("--height", type=int, default=100, help="no. of rows")
+    parser.add_argument("--mines", type=int, help="no. of mines, {:.0%} of tiles by default".format(MINES_DENSITY))
+    parser.add_argument("--window", type=int, nargs=2, default=[800, 600], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--tile-size", type=int, default=16, choices=ZOOM_LEVELS)
+    args = parser.parse_args()
+
+    if args.mines is None:
+        args.mines = int(args.width * args.height * MINES_DENSITY)
+    if not 0 <= args.mines <= Board.get_max_mines(args.width, args.height):
+        parser.error("--mines must be from 0 to {}".format(Board.get_max_mines(args.width, args.height)))
+
+    pygame.init()
+    screen = pygame.display.set_mode(args.window)
+    pygame.display.set_caption("Minesweeper")
+
+    board = Board(args.width, args.height, args.mines)
+    renderer = BoardRenderer(board, screen, tile_size=args.tile_size)
+    clock = pygame.time.Clock()
+    frames = 0
+    game_over = False
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                pygame.quit()
+                sys.exit()
+            elif event.type == MOUSEBUTTONDOWN and event.button in (4, 5):
+                renderer.zoom(1 if event.button == 4 else -1, event.pos)
+            elif event.type == MOUSEBUTTONDOWN and not game_over:
+                tile = renderer.tile_at(*event.pos)
+                if tile is None:
+                    continue
+
+                if event.button == 1:
+                    try:
+                        board.click(*tile)
+                    except (Board.GameOverException, Board.GameFinishedException) as e:
+                        print(e)
+                        board.visibility_matrix[board.matrix == Board.MINE] = True
+                        game_over = True
+                    except RecursionError:
+                        # Board uncovers the clear areas recursively, the large ones exceed the recursion limit
+                        print("Clear area too large to uncover, it is uncovered only partially "
+                              "and the game may not be finishable.")
+                elif event.button == 3:
+                    if not board.remove_flag(*tile):
+                        board.place_flag(*tile)
+            elif event.type == MOUSEMOTION and event.buttons[1]:
+                renderer.scroll(-event.rel[0], -event.rel[1])
+
+        keys = pygame.key.get_pressed()
+        renderer.scroll((keys[K_RIGHT] - keys[K_LEFT]) * SCROLL_STEP, (keys[K_DOWN] - keys[K_UP]) * SCROLL_STEP)
+
+        rects = renderer.draw()
+        if rects:
+            pygame.display.update(rects)
+
+        clock.tick(60)
+        frames += 1
+        if frames % 60 == 0:
+            pygame.display.set_caption("Minesweeper - {:.0f} FPS".format(clock.get_fps()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from game_server import GameServer, LENGTH, REQUEST_HEADER, RESPONSE_HEADER, STEP, ERROR, encode_frame
+from games import GameMinesweeper
+from load_client import GameClient, ServerError
+
+
+class GameServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "server.sock")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_with_server(self, test, **server_kwargs):
+        """
+        Starts the GameServer in-process on the Unix socket, runs the coroutine test(client) and stops the server.
+        """
+
+        async def run():
+            server = GameServer(**server_kwargs)
+            serving = asyncio.ensure_future(server.serve(unix_path=self.path))
+
+            while not os.path.exists(self.path):
+                await asyncio.sleep(0.01)
+
+            client = await GameClient.connect(unix_path=self.path)
+            try:
+                await test(client)
+            finally:
+                await client.close()
+                serving.cancel()
+
+        asyncio.run(run())
+
+    def test_round_trip(self):
+        async def test(client):
+            session_id, reward, done, observation = await client.new("2048", 4, 4, 4)
+            self.assertEqual((reward, done), (0.0, False))
+            self.assertEqual(observation.shape, (4, 4))
+            self.assertEqual(np.count_nonzero(observation), 2)
+
+            _, reward, done, observation = await client.step(session_id, 0)
+            self.assertEqual(observation.shape, (4, 4))
+            self.assertGreaterEqual(reward, 0.0)
+
+            _, reward, done, observation = await client.reset(session_id)
+            self.assertEqual(np.count_nonzero(observation), 2)
+
+            self.assertEqual((await client.close_session(session_id))[0], session_id)
+            with self.assertRaisesRegex(ServerError, "Unknown session"):
+                await client.step(session_id, 0)
+
+        self.run_with_server(test)
+
+    def test_finished_session_needs_reset(self):
+        async def test(client):
+            # no mines: the first click uncovers the whole board and wins
+            session_id, _, _, _ = await client.new("minesweeper", 2, 2, 0)
+
+            _, reward, done, observation = await client.step(session_id, 0)
+            self.assertEqual((reward, done), (4.0, True))
+
+            with self.assertRaisesRegex(ServerError, "finished"):
+                await client.step(session_id, 0)
+
+            _, _, done, observation = await client.reset(session_id)
+            self.assertFalse(done)
+            self.assertTrue((observation == GameMinesweeper.HIDDEN).all())
+            self.assertTrue((await client.step(session_id, 0))[2])
+
+        self.run_with_server(test)
+
+    def test_invalid_requests(self):
+        async def test(client):
+            with self.assertRaisesRegex(ServerError, "Unknown session"):
+                await client.reset(12345)
+            with self.assertRaisesRegex(ServerError, "Board size"):
+                await client.new("2048", 65, 4, 4)
+            with self.assertRaisesRegex(ServerError, "at most 400 tiles"):
+                await client.new("minesweeper", 30, 30, 10)
+            with self.assertRaisesRegex(ServerError, "n_mines"):
+                await client.new("minesweeper", 3, 3, 1)
+
+            session_id, _, _, _ = await client.new("2048", 4, 4, 4)
+            with self.assertRaisesRegex(ServerError, "Action"):
+                await client.step(session_id, 4)
+
+        self.run_with_server(test, max_board_size=64)
+
+    def test_malformed_frame(self):
+        async def test(client):
+            reader, writer = await asyncio.open_unix_connection(self.path)
+            # STEP without the session id and action
+            writer.write(encode_frame(REQUEST_HEADER.pack(STEP, 7)))
+
+            length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+            body = await reader.readexactly(length)
+            writer.close()
+
+            self.assertEqual(RESPONSE_HEADER.unpack_from(body), (ERROR, 7))
+            self.assertEqual(body[RESPONSE_HEADER.size:], b"Malformed request")
+
+            # the server keeps serving the other connections
+            session_id, _, _, _ = await client.new("2048", 4, 4, 4)
+            await client.step(session_id, 1)
+
+        self.run_with_server(test)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import random
+import unittest
+
+import numpy as np
+
+import instrumentation
+from games import make_game
+
+
+class DummyBoard(object):
+
+    def move(self):
+        self._Board__move_line()
+
+    def _Board__move_line(self):
+        return np.zeros(1000)
+
+    def check_gameover(self):
+        for _ in range(4):
+            self.move()
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disable_restores_methods(self):
+        original = DummyBoard.__dict__["move"]
+        instrumentation.enable(boards={"2048": DummyBoard})
+        self.assertIsNot(DummyBoard.__dict__["move"], original)
+
+        instrumentation.disable()
+        self.assertIs(DummyBoard.__dict__["move"], original)
+
+    def test_allocations_without_bookkeeping(self):
+        instrumentation.enable(track_allocations=True, boards={"2048": DummyBoard})
+        board = DummyBoard()
+
+        for _ in range(1000):
+            board.check_gameover()
+
+        methods = instrumentation.snapshot()["methods"]
+        self.assertEqual(methods["2048.Board.check_gameover"]["calls"], 1000)
+        self.assertEqual(methods["2048.Board.move"]["calls"], 4000)
+        # the returned array outlives __move_line, move frees it, so nothing outlives move and check_gameover
+        self.assertGreaterEqual(methods["2048.Board.__move_line"]["net_allocated_bytes"], 4000 * 8000)
+        for name in ("2048.Board.check_gameover", "2048.Board.move"):
+            self.assertLess(abs(methods[name]["net_allocated_bytes"]), 1000)
+        # each call allocates the 8000 B array
+        self.assertGreaterEqual(methods["2048.Board.__move_line"]["max_peak_allocated_bytes"], 8000)
+        self.assertGreaterEqual(methods["2048.Board.check_gameover"]["max_peak_allocated_bytes"], 8000)
+
+    def test_recursion_unchanged(self):
+        def play(seed):
+            random.seed(seed)
+            np.random.seed(seed)
+            game = make_game("minesweeper", width=40, height=40, n_mines=80)
+            observation = np.zeros(game.observation_shape, dtype=game.OBSERVATION_DTYPE)
+            game.reset(observation)
+            return game.step(20 * 40 + 20, observation), observation.tobytes()
+
+        expected = [play(seed) for seed in range(10)]
+        instrumentation.enable()
+
+        self.assertEqual([play(seed) for seed in range(10)], expected)
+        self.assertEqual(instrumentation.snapshot()["methods"]["minesweeper.Board.__uncover"]["calls"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from games import Game2048, GameMinesweeper, make_game
+from vector_env import VectorEnv
+
+
+def score_line(line:list) -> int:
+    """
+    Brute-force 2048 score of moving one line towards its start: every merged pair scores its new value.
+    """
+
+    tiles = [x for x in line if x]
+    score = 0
+    i = 0
+
+    while i < len(tiles) - 1:
+        if tiles[i] == tiles[i+1]:
+            score += 2 * tiles[i]
+            i += 2
+        else:
+            i += 1
+
+    return score
+
+
+def score_move(matrix:np.ndarray, direction:str) -> int:
+    if direction == "left":
+        lines = [row for row in matrix]
+    elif direction == "right":
+        lines = [row[::-1] for row in matrix]
+    elif direction == "up":
+        lines = [column for column in matrix.T]
+    else:
+        lines = [column[::-1] for column in matrix.T]
+
+    return sum(score_line(list(line)) for line in lines)
+
+
+class Game2048Test(unittest.TestCase):
+
+    def test_merge_reward_matches_brute_force(self):
+        random_state = np.random.RandomState(0)
+        game = make_game("2048", width=4, height=4)
+        observation = np.zeros(game.observation_shape, dtype=game.OBSERVATION_DTYPE)
+
+        for _ in range(500):
+            game.reset(observation)
+            matrix = random_state.choice([0, 0, 2, 4, 8, 16, 32], size=(4, 4)).astype(np.int32)
+            action = random_state.randint(4)
+            game.board.matrix = np.copy(matrix)
+
+            reward, _ = game.step(action, observation)
+
+            self.assertEqual(reward, score_move(matrix, game.board.POSSIBLE_MOVES[action]))
+
+    def test_merge_reward_example(self):
+        game = make_game("2048", width=4, height=4)
+        observation = np.zeros(game.observation_shape, dtype=game.OBSERVATION_DTYPE)
+        game.reset(observation)
+        game.board.matrix = np.array([[2, 2, 4, 4], [8, 8, 8, 0], [16, 16, 0, 0], [0, 0, 0, 0]], dtype=np.int32)
+
+        reward, done = game.step(game.board.POSSIBLE_MOVES.index("left"), observation)
+
+        self.assertEqual(reward, 4 + 8 + 16 + 32)
+        self.assertFalse(done)
+
+    def test_invalid_settings(self):
+        self.assertRaises(ValueError, Game2048, 1, 1)
+        self.assertRaises(ValueError, Game2048, 4, 4, max_random_value=3)
+
+
+class GameMinesweeperTest(unittest.TestCase):
+
+    def test_mines_count_validation(self):
+        self.assertRaises(ValueError, GameMinesweeper, 3, 3, 1)
+        self.assertRaises(ValueError, GameMinesweeper, 9, 9, 73)
+        GameMinesweeper(2, 2, 0)
+        GameMinesweeper(9, 9, 72)
+
+    def test_recursion_error_ends_game(self):
+        game = make_game("minesweeper", width=60, height=60, n_mines=5)
+        observation = np.zeros(game.observation_shape, dtype=game.OBSERVATION_DTYPE)
+        game.reset(observation)
+
+        reward, done = game.step(30 * 60 + 30, observation)
+
+        self.assertTrue(done)
+        self.assertEqual(reward, np.count_nonzero(observation != GameMinesweeper.HIDDEN))
+
+
+class VectorEnvTest(unittest.TestCase):
+
+    def test_auto_reset(self):
+        # no mines: the first click uncovers the whole board and wins
+        with VectorEnv("minesweeper", n_envs=2, n_workers=1, seed=0, width=4, height=4, n_mines=0) as env:
+            observations = env.reset()
+            self.assertTrue((observations == GameMinesweeper.HIDDEN).all())
+
+            observations, rewards, dones = env.step([0, 5])
+
+            self.assertTrue(dones.all())
+            self.assertEqual(list(rewards), [16.0, 16.0])
+            # observations are already the start of the new games
+            self.assertTrue((observations == GameMinesweeper.HIDDEN).all())
+
+    def test_action_range(self):
+        with VectorEnv("2048", n_envs=2, n_workers=1, seed=0, width=4, height=4) as env:
+            env.reset()
+
+            self.assertRaises(ValueError, env.step, [-1, 0])
+            self.assertRaises(ValueError, env.step, [0, env.n_actions])
+            self.assertRaises(ValueError, env.step, [0])
+
+            observations, rewards, dones = env.step([0, 1])
+            self.assertEqual(observations.shape, (2, 4, 4))
+
+    def test_invalid_settings(self):
+        self.assertRaises(ValueError, VectorEnv, "minesweeper", 1, width=3, height=3, n_mines=1)
+        self.assertRaises(ValueError, VectorEnv, "chess", 1)
+
+    def test_close_releases_shared_memory(self):
+        env = VectorEnv("2048", n_envs=2, n_workers=2, seed=0, width=4, height=4)
+        env.reset()
+        names = env.shared_memory_names
+        env.close()
+
+        for name in names:
+            self.assertRaises(FileNotFoundError, shared_memory.SharedMemory, name=name)
+        self.assertRaises(RuntimeError, env.reset)
+
+
+if __name__ == "__main__":
+    unittest.main()
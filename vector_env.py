@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Multiprocess vector environment for the games from games.py.
+
+The games are stepped in worker subprocesses, which write the observations, rewards and done flags straight
+into multiprocessing.shared_memory Numpy buffers. The actions are passed the same way and the workers are only
+woken up by one-byte messages, so stepping needs no pickling.
+"""
+
+import multiprocessing as mp
+import random
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import instrumentation
+from games import make_game
+
+_RESET = b"r"
+_STEP = b"s"
+_CLOSE = b"c"
+_OK = b""
+_ERROR = b"e"
+
+
+class SharedArray(object):
+    """
+    Numpy array backed by the multiprocessing.shared_memory block.
+    """
+
+    def __init__(self, shape:tuple, dtype):
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+
+        self.__shm = shared_memory.SharedMemory(create=True, size=size)
+        self.__shape = shape
+        self.__dtype = dtype
+        self.__array = None
+
+    @property
+    def array(self) -> np.ndarray:
+        """
+        :return: the array view of the shared memory, created lazily, so the unpickled copy in the worker
+                 attaches to the same memory block
+        """
+
+        if self.__array is None:
+            self.__array = np.ndarray(self.__shape, dtype=self.__dtype, buffer=self.__shm.buf)
+
+        return self.__array
+
+    def close(self):
+        self.__array = None
+        try:
+            self.__shm.close()
+        except BufferError:
+            # the array is still referenced outside, the memory is released with it
+            pass
+
+    @property
+    def name(self) -> str:
+        """
+        :return: the shared memory block name
+        """
+
+        return self.__shm.name
+
+    def unlink(self):
+        self.__shm.unlink()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_SharedArray__array"] = None
+        return state
+
+
+def _worker(pipe, indexes:range, observations:SharedArray, rewards:SharedArray, dones:SharedArray,
+            actions:SharedArray, seed:int, game:str, game_kwargs:dict):
+    """
+    Worker subprocess loop, steps the games with given indexes on the command from the pipe.
+    """
+
+    random.seed(seed)
+    np.random.seed(seed)
+    reporter = instrumentation.enable_from_env()
+
+    games = [make_game(game, **game_kwargs) for _ in indexes]
+    obs, rew, done, act = observations.array, rewards.array, dones.array, actions.array
+
+    try:
+        while True:
+            command = pipe.recv_bytes()
+
+            try:
+                if command == _STEP:
+                    for i, env in zip(indexes, games):
+                        rew[i], done[i] = env.step(int(act[i]), obs[i])
+                        if done[i]:
+                            env.reset(obs[i])
+                elif command == _RESET:
+                    for i, env in zip(indexes, games):
+                        env.reset(obs[i])
+                    rew[indexes.start:indexes.stop] = 0
+                    done[indexes.start:indexes.stop] = False
+                elif command == _CLOSE:
+                    break
+            except Exception:
+                pipe.send_bytes(_ERROR + traceback.format_exc().encode())
+            else:
+                pipe.send_bytes(_OK)
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        if reporter is not None:
+            reporter.stop()
+        obs = rew = done = act = None
+        for shared_array in (observations, rewards, dones, actions):
+            shared_array.close()
+        pipe.close()
+
+
+class VectorEnv(object):
+    """
+    Steps n_envs games of one kind in n_workers subprocesses with one reset/step interface.
+
+    The returned observations, rewards and dones are the shared buffers themselves, they are overwritten
+    by the next step() or reset() call, so copy them if they have to be kept.
+
+    Finished games are reset automatically: when dones[i] is True, observations[i] is already the initial
+    observation of the new game and rewards[i] is the reward of the last step of the finished one.
+
+    example:
+    with VectorEnv("2048", n_envs=64, n_workers=8, width=4, height=4) as env:
+        observations = env.reset()
+        observations, rewards, dones = env.step(np.random.randint(0, env.n_actions, size=64))
+    """
+
+    def __init__(self, game:str, n_envs:int, n_workers:int=None, seed:int=None, **game_kwargs):
+        """
+        :param game: the game name, one of games.GAMES keys: '2048', 'minesweeper'
+        :param n_envs: no. of games
+        :param n_workers: no. of worker subprocesses, no. of CPUs by default (maximally n_envs)
+        :param seed: random seed, the worker i uses seed + i
+        :param game_kwargs: the game (board) constructor arguments, e.g. width=4, height=4
+        """
+
+        if n_workers is None:
+            n_workers = mp.cpu_count()
+        n_workers = min(n_workers, n_envs)
+
+        if n_workers < 1:
+            raise ValueError("'n_envs' and 'n_workers' must be positive")
+
+        if seed is None:
+            seed = random.randrange(2**31)
+
+        template = make_game(game, **game_kwargs)
+        self.__n_envs = n_envs
+        self.__n_actions = template.n_actions
+        self.__closed = False
+
+        self.__shared_arrays = [
+            SharedArray((n_envs,) + template.observation_shape, template.OBSERVATION_DTYPE),
+            SharedArray((n_envs,), np.float32),
+            SharedArray((n_envs,), bool),
+            SharedArray((n_envs,), np.int64),
+        ]
+        self.__observations, self.__rewards, self.__dones, self.__actions = \
+            [shared_array.array for shared_array in self.__shared_arrays]
+
+        self.__pipes = []
+        self.__processes = []
+        bounds = np.linspace(0, n_envs, n_workers + 1).astype(int)
+
+        for i in range(n_workers):
+            parent_pipe, child_pipe = mp.Pipe()
+            process = mp.Process(target=_worker,
+                                 args=(child_pipe, range(bounds[i], bounds[i+1]), *self.__shared_arrays,
+                                       seed + i, game, game_kwargs),
+                                 daemon=True)
+            process.start()
+            child_pipe.close()
+            self.__pipes.append(parent_pipe)
+            self.__processes.append(process)
+
+    @property
+    def n_envs(self) -> int:
+        return self.__n_envs
+
+    @property
+    def n_workers(self) -> int:
+        return len(self.__processes)
+
+    @property
+    def n_actions(self) -> int:
+        return self.__n_actions
+
+    @property
+    def shared_memory_names(self) -> list:
+        """
+        :return: names of the shared memory blocks of observations, rewards, dones and actions
+        """
+
+        return [shared_array.name for shared_array in self.__shared_arrays]
+
+    @property
+    def observations(self) -> np.ndarray:
+        return self.__observations
+
+    def reset(self) -> np.ndarray:
+        """
+        Starts new games in all environments.
+
+        :return: the observations, Numpy array of shape (n_envs, rows, columns)
+        """
+
+        self.__send(_RESET)
+        return self.__observations
+
+    def step(self, actions) -> tuple:
+        """
+        Performs one action in every environment.
+
+        :param actions: sequence of n_envs action indexes, each in range(n_actions)
+        :return: (observations, rewards, dones)
+        """
+
+        actions = np.asarray(actions)
+
+        if actions.shape != (self.__n_envs,):
+            raise ValueError("'actions' must be a sequence of {} action indexes".format(self.__n_envs))
+        # checked here, the workers would index the negative actions silently or fail halfway through their games
+        if actions.min() < 0 or actions.max() >= self.__n_actions:
+            raise ValueError("Actions must be in range(0, {})".format(self.__n_actions))
+
+        self.__actions[:] = actions
+        self.__send(_STEP)
+        return self.__observations, self.__rewards, self.__dones
+
+    def close(self):
+        """
+        Stops the workers and releases the shared memory.
+        """
+
+        if self.__closed:
+            return
+        self.__closed = True
+
+        for pipe in self.__pipes:
+            try:
+                pipe.send_bytes(_CLOSE)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.__processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for pipe in self.__pipes:
+            pipe.close()
+
+        self.__observations = self.__rewards = self.__dones = self.__actions = None
+        for shared_array in self.__shared_arrays:
+            shared_array.close()
+            shared_array.unlink()
+
+    def __send(self, command:bytes):
+        if self.__closed:
+            raise RuntimeError("The environment is closed")
+
+        for pipe in self.__pipes:
+            pipe.send_bytes(command)
+
+        errors = [response[1:].decode() for response in (pipe.recv_bytes() for pipe in self.__pipes)
+                  if response.startswith(_ERROR)]
+
+        if errors:
+            raise RuntimeError("Worker failed:\n{}".format(errors[0]))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,76 @@
+"""
+Measures the VectorEnv steps/sec scaling across the worker counts.
+
+usage: python vector_env_benchmark.py [--seconds 3] [--envs-per-worker 16]
+"""
+
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from vector_env import VectorEnv
+
+GAMES_KWARGS = {
+    "2048": {"width": 4, "height": 4},
+    "minesweeper": {"width": 9, "height": 9, "n_mines": 10},
+}
+
+
+def measure(game:str, n_workers:int, n_envs:int, seconds:float) -> float:
+    """
+    Steps the environment with random actions for the given time.
+
+    :return: steps/sec (one step = one action in one game)
+    """
+
+    with VectorEnv(game, n_envs, n_workers, seed=0, **GAMES_KWARGS[game]) as env:
+        env.reset()
+        actions = np.random.randint(0, env.n_actions, size=(64, n_envs))
+        n_steps = 0
+        start = time.perf_counter()
+
+        while time.perf_counter() - start < seconds:
+            env.step(actions[n_steps % len(actions)])
+            n_steps += 1
+
+        return n_steps * n_envs / (time.perf_counter() - start)
+
+
+def get_worker_counts() -> list:
+    counts = [1]
+
+    while counts[-1] * 2 <= mp.cpu_count():
+        counts.append(counts[-1] * 2)
+    if counts[-1] != mp.cpu_count():
+        counts.append(mp.cpu_count())
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0, help="measured time per configuration")
+    parser.add_argument("--envs-per-worker", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts, powers of 2 up to no. of CPUs by default")
+    args = parser.parse_args()
+
+    worker_counts = args.workers or get_worker_counts()
+
+    for game in GAMES_KWARGS:
+        print("{} {}".format(game, GAMES_KWARGS[game]))
+        print("{:>8} {:>8} {:>12} {:>8}".format("workers", "envs", "steps/sec", "speedup"))
+        baseline = None
+
+        for n_workers in worker_counts:
+            n_envs = n_workers * args.envs_per_worker
+            steps_per_sec = measure(game, n_workers, n_envs, args.seconds)
+            baseline = baseline or steps_per_sec
+            print("{:>8} {:>8} {:>12.0f} {:>7.2f}x".format(n_workers, n_envs, steps_per_sec, steps_per_sec / baseline))
+
+        print()
+
+
+if __name__ == "__main__":
+    main()